@@ -1,13 +1,22 @@
 # Общие константы/SCPI, как в исходнике
+import sys
+
 DEFAULT_BACKENDS = ["@py", ""]
 POLL_PERIOD_S = 5
+POLL_TIMEOUT_MS = 500       # таймаут VISA для опроса (connect/IDN/Set — обычные 5000 мс)
+SCAN_TIMEOUT_S = 3   # предел на list_resources одного backend'а при скане
 READ_TERM = "\n"
 WRITE_TERM = "\n"
 
-SCPI_QUERY_POWER = "MEAS:POW?"
-SCPI_ZERO        = "SENS:POW:ZERO:IMM"
-SCPI_QUERY_FREQ  = "SENS:FREQ?"
+SCPI_QUERY_POWER = sys.intern("MEAS:POW?")
+SCPI_ZERO        = sys.intern("SENS:POW:ZERO:IMM")
+SCPI_QUERY_FREQ  = sys.intern("SENS:FREQ?")
 SCPI_SET_FREQ    = "SENS:FREQ {freq}"
 
+# те же фиксированные команды, заранее закодированные с терминатором (для *_bytes)
+SCPI_QUERY_POWER_B = (SCPI_QUERY_POWER + WRITE_TERM).encode("ascii")
+SCPI_ZERO_B        = (SCPI_ZERO + WRITE_TERM).encode("ascii")
+SCPI_QUERY_FREQ_B  = (SCPI_QUERY_FREQ + WRITE_TERM).encode("ascii")
+
 # Можно оставить пустым, либо задать адрес по умолчанию
 PREFERRED_USB = ""  # пример: "USB0::...::INSTR" или "FAKE"
@@ -1,8 +1,38 @@
 # core/controller.py
-from drivers.discovery import scan_usb_usbtmc
+from functools import lru_cache
+
+from drivers.discovery import scan_usb_usbtmc_with_backends, close_cached_rms
 from core.meter import Meter
-from core.constants import DEFAULT_BACKENDS, SCPI_QUERY_POWER, SCPI_QUERY_FREQ, SCPI_SET_FREQ, SCPI_ZERO
-from core.utils import parse_float
+from core.constants import (
+    DEFAULT_BACKENDS, SCPI_QUERY_FREQ, SCPI_SET_FREQ, WRITE_TERM,
+    SCPI_QUERY_POWER_B, SCPI_QUERY_FREQ_B, SCPI_ZERO_B,
+)
+from core.utils import parse_float, parse_hz
+
+
+@lru_cache(maxsize=64)
+def _fmt_set_freq(hz: int) -> str:
+    # частоту меняют редко — готовая строка команды обычно уже в кэше
+    return SCPI_SET_FREQ.format(freq=hz)
+
+
+@lru_cache(maxsize=64)
+def _set_freq_bytes(hz: int) -> bytes:
+    return (_fmt_set_freq(hz) + WRITE_TERM).encode("ascii")
+
+
+def _to_hz(hz: int | float | str) -> int:
+    """Частота в целых Гц; строку разбираем только если пришла строка."""
+    if hz is None:
+        raise ValueError("Частота не задана")
+    if isinstance(hz, int):
+        return hz
+    if isinstance(hz, float):
+        return int(hz)
+    v = parse_hz(hz)
+    if v is None:
+        raise ValueError(f"Не удалось распознать частоту: {hz}")
+    return v
 
 
 class MeasurementController:
@@ -18,20 +48,36 @@ class MeasurementController:
     def __init__(self):
         self.meter = Meter(DEFAULT_BACKENDS)
         self.resource = None
+        self._idn_cache: dict[str, str] = {}
+        self._backend_hint: dict[str, str] = {}  # ресурс -> backend, на котором его нашёл скан
 
     # --- discovery ---
     def scan(self):
-        addrs = scan_usb_usbtmc(DEFAULT_BACKENDS)
+        found = scan_usb_usbtmc_with_backends(DEFAULT_BACKENDS)
+        self._backend_hint = dict(found)
+        addrs = [r for r, _be in found]
         # добавим симулятор
         if "FAKE" not in addrs:
-            addrs = list(addrs) + ["FAKE"]
+            addrs.append("FAKE")
         return addrs
 
     # --- connect ---
     def connect(self, resource: str):
-        self.meter.connect(resource)
+        # повторный connect на тот же ресурс — без лишнего *IDN?
+        if self.is_connected_to(resource):
+            return self._idn_cache.get(resource, "")
+        self.meter.connect(resource, preferred_backend=self._backend_hint.get(resource))
         self.resource = resource
-        return self.meter.idn()
+        idn = self.meter.idn()
+        self._idn_cache[resource] = idn
+        return idn
+
+    def is_connected_to(self, resource: str) -> bool:
+        if self.meter is None:
+            return False
+        if hasattr(self.meter, "is_connected_to"):
+            return self.meter.is_connected_to(resource)
+        return self.resource == resource
 
     def is_connected(self) -> bool:
         return self.meter is not None and self.resource is not None
@@ -41,24 +87,33 @@ class MeasurementController:
 
     # --- operations ---
     def read_power(self) -> float:
-        raw = self.meter.query(SCPI_QUERY_POWER)
+        raw = self.meter.query_bytes(SCPI_QUERY_POWER_B).decode("ascii", "replace")
         val = parse_float(raw)
         if val is None:
             raise RuntimeError(f"Parse error: {raw}")
         return val
 
     def get_freq(self) -> int:
-        raw = self.meter.query(SCPI_QUERY_FREQ)
+        raw = self.meter.query_bytes(SCPI_QUERY_FREQ_B).decode("ascii", "replace")
         val = parse_float(raw)
         if val is None:
             raise RuntimeError(f"Parse error: {raw}")
         return int(val)
 
     def set_freq(self, hz: int | float | str):
-        self.meter.write(SCPI_SET_FREQ.format(freq=int(parse_float(str(hz)))))
+        self.meter.write_bytes(_set_freq_bytes(_to_hz(hz)))
+
+    def set_and_get_freq(self, hz: int | float | str) -> int:
+        """SENS:FREQ + SENS:FREQ? одной составной командой (один round trip)."""
+        s = _to_hz(hz)
+        raw = self.meter.query(f"{_fmt_set_freq(s)};:{SCPI_QUERY_FREQ}")
+        val = parse_float(raw)
+        if val is None:
+            raise RuntimeError(f"Parse error: {raw}")
+        return int(val)
 
     def zero(self):
-        self.meter.write(SCPI_ZERO)
+        self.meter.write_bytes(SCPI_ZERO_B)
 
     # --- cleanup ---
     def close(self):
@@ -66,3 +121,4 @@ class MeasurementController:
             self.meter.close()
             self.meter = None
             self.resource = None
+        close_cached_rms()
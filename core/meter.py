@@ -1,3 +1,5 @@
+from contextlib import nullcontext
+
 from core.constants import READ_TERM, WRITE_TERM
 from drivers.visa_meter import VisaMeter
 from drivers.fake_meter import FakeMeter
@@ -10,11 +12,12 @@ class Meter:
         self.backend_in_use = None
         self._impl = None   # экземпляр VisaMeter или FakeMeter
         self.resource = None
+        self._last_resource = None  # для повторного подключения без clear()
 
     def is_connected_to(self, resource: str) -> bool:
         return self._impl is not None and self.resource == resource
 
-    def connect(self, resource: str, timeout_ms: int = 5000):
+    def connect(self, resource: str, timeout_ms: int = 5000, preferred_backend=None):
         res_upper = (resource or "").strip().upper()
         if self.is_connected_to(resource):
             return
@@ -27,10 +30,13 @@ class Meter:
             return
         # реальный прибор через VISA
         impl = VisaMeter(self.backend_order, read_term=READ_TERM, write_term=WRITE_TERM)
-        impl.connect(resource, timeout_ms=timeout_ms)
+        impl.connect(resource, timeout_ms=timeout_ms,
+                     clear_on_connect=resource != self._last_resource,
+                     preferred_backend=preferred_backend)
         self._impl = impl
         self.backend_in_use = impl.backend_in_use
         self.resource = resource
+        self._last_resource = resource
 
     def close(self):
         try:
@@ -52,6 +58,28 @@ class Meter:
             raise RuntimeError("Нет соединения")
         return self._impl.write(cmd)
 
+    def query_many(self, cmds) -> list[str]:
+        """Несколько запросов за один round trip: ['A?', 'B?'] -> 'A?;:B?' -> ['a', 'b']."""
+        if len(cmds) == 1:
+            return [self.query(cmds[0])]
+        resp = self.query(";:".join(cmds))
+        return [p.strip() for p in resp.split(";")]
+
+    def with_timeout(self, ms: int):
+        if not self._impl:
+            return nullcontext()
+        return self._impl.with_timeout(ms)
+
+    def query_bytes(self, cmd_bytes: bytes) -> bytes:
+        if not self._impl:
+            raise RuntimeError("Нет соединения")
+        return self._impl.query_bytes(cmd_bytes)
+
+    def write_bytes(self, cmd_bytes: bytes):
+        if not self._impl:
+            raise RuntimeError("Нет соединения")
+        return self._impl.write_bytes(cmd_bytes)
+
     def idn(self) -> str:
         if not self._impl:
             return "Фейкометр 1.0"
@@ -1,18 +1,43 @@
 import re
 
 _UNIT = {"hz": 1.0, "khz": 1e3, "mhz": 1e6, "ghz": 1e9}
+_UNIT_INT = {"hz": 1, "khz": 1_000, "mhz": 1_000_000, "ghz": 1_000_000_000}
+_NUM = r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?'
+_NUM_RE = re.compile(_NUM)   # голое число целиком: float() сам пропустил бы nan/inf/1_000
+_FLOAT_RE = re.compile(rf'({_NUM})\s*([A-Za-z]+)?')
 
 def parse_float(text: str):
     """Достаёт число из строки + применяет суффиксы Hz/kHz/MHz/GHz.
     dBm/прочие единицы не трогаем: просто число."""
     if not text:
         return None
-    t = str(text).strip()
-    m = re.search(r'([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)\s*([a-zA-Z]+)?', t)
+    t = text.strip() if isinstance(text, str) else str(text).strip()
+    # быстрый путь: SCPI почти всегда отвечает голым числом
+    # (голое число всегда кончается цифрой — с единицей сразу идём в regex)
+    if t[-1:].isdigit() and _NUM_RE.fullmatch(t):
+        return float(t)
+    # число с единицей ("1.5 GHz", "-42.731 dBm") и прочее — через regex
+    m = _FLOAT_RE.search(t)
     if not m:
         return None
     val = float(m.group(1))
-    unit = (m.group(2) or "").lower()
-    if unit in _UNIT:
-        val *= _UNIT[unit]
-    return val
+    u = m.group(2)
+    if u is None:
+        return val
+    return val * _UNIT.get(u.lower(), 1.0)
+
+def parse_hz(text: str):
+    """Частота в целых Гц ("1 GHz" -> 1000000000), None если числа нет.
+    Целое число масштабируем целочисленно; дробное — через float с округлением
+    (int() отрезал бы 1.001 kHz до 1000 Гц)."""
+    if not text:
+        return None
+    t = text.strip() if isinstance(text, str) else str(text).strip()
+    m = _FLOAT_RE.search(t)
+    if not m:
+        return None
+    num, u = m.group(1), m.group(2)
+    mul = _UNIT_INT.get(u.lower(), 1) if u else 1
+    if "." not in num and "e" not in num and "E" not in num:
+        return int(num) * mul
+    return round(float(num) * mul)
@@ -1,26 +1,88 @@
-from typing import List
-
-try:
-    import pyvisa
-    HAS_VISA = True
-except Exception:
-    pyvisa = None
-    HAS_VISA = False
-
-def scan_usb_usbtmc(backends: List[str]) -> List[str]:
-    """Сканируем USB?*::INSTR по указанным backend'ам и объединяем без дублей."""
-    addrs: List[str] = []
+import logging
+import threading
+from concurrent.futures import Future, wait
+from typing import Dict, List, Tuple
+
+from core.constants import SCAN_TIMEOUT_S
+from drivers import visa_meter
+from drivers.visa_meter import _load_visa  # общий ленивый импорт pyvisa
+
+# ResourceManager'ы по backend'ам: viOpenDefaultRM бывает очень медленным,
+# поэтому создаём один раз и переиспользуем между сканами.
+_RM_CACHE: Dict[str, "visa_meter.pyvisa.ResourceManager"] = {}
+_RM_LOCK = threading.Lock()
+
+log = logging.getLogger(__name__)
+
+def _get_rm(be: str):
+    with _RM_LOCK:
+        rm = _RM_CACHE.get(be)
+    if rm is not None:
+        return rm
+    # создаём вне блокировки, чтобы backend'ы инициализировались параллельно
+    pyvisa = visa_meter.pyvisa  # модуль появляется только после _load_visa()
+    rm = pyvisa.ResourceManager(be) if be else pyvisa.ResourceManager()
+    with _RM_LOCK:
+        cached = _RM_CACHE.setdefault(be, rm)
+    if cached is not rm:
+        try:
+            rm.close()
+        except Exception:
+            pass
+    return cached
+
+def close_cached_rms():
+    """Закрывает закэшированные ResourceManager'ы (вызывать при завершении)."""
+    with _RM_LOCK:
+        rms = list(_RM_CACHE.values())
+        _RM_CACHE.clear()
+    for rm in rms:
+        try:
+            rm.close()
+        except Exception:
+            pass
+
+def _scan_one(be: str) -> List[str]:
+    return list(_get_rm(be).list_resources("USB?*::INSTR"))
+
+def _submit_daemon(fn, *args) -> Future:
+    """Как executor.submit, но в daemon-потоке: зависший VISA-вызов
+    не должен держать процесс при выходе (воркеры ThreadPoolExecutor join'ятся)."""
+    fut: Future = Future()
+
+    def run():
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return fut
+
+def scan_usb_usbtmc(backends: List[str], timeout_s: float = SCAN_TIMEOUT_S) -> List[str]:
+    """Сканируем USB?*::INSTR по указанным backend'ам и объединяем без дублей.
+    Backend, не уложившийся в timeout_s, пропускается."""
+    return [r for r, _be in scan_usb_usbtmc_with_backends(backends, timeout_s)]
+
+def scan_usb_usbtmc_with_backends(backends: List[str], timeout_s: float = SCAN_TIMEOUT_S) -> List[Tuple[str, str]]:
+    """То же, но пары (ресурс, backend, который его увидел первым) — подсказка для connect."""
+    addrs: List[Tuple[str, str]] = []
     seen = set()
-    if not HAS_VISA:
+    if not _load_visa() or not backends:
         return addrs
-    for be in backends:
+    # backend'ы независимы — опрашиваем одновременно, порядок сохраняем по списку
+    futures = [_submit_daemon(_scan_one, be) for be in backends]
+    wait(futures, timeout=timeout_s)
+    for be, fut in zip(backends, futures):
+        if not fut.done():
+            log.warning("scan: backend %s не ответил за %.1f с, пропускаем", be or "default", timeout_s)
+            continue
         try:
-            rm = pyvisa.ResourceManager(be) if be else pyvisa.ResourceManager()
-            res = rm.list_resources("USB?*::INSTR")
-            for r in res:
-                if r not in seen:
-                    seen.add(r)
-                    addrs.append(r)
+            res = fut.result()
         except Exception:
-            pass
+            continue
+        for r in res:
+            if r not in seen:
+                seen.add(r)
+                addrs.append((r, be))
     return addrs
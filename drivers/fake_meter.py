@@ -1,5 +1,43 @@
 import random
-import threading
+from contextlib import nullcontext
+
+# numpy импортируется лениво — только когда реально создают симулятор
+np = None
+HAS_NUMPY = None   # None — ещё не пробовали импортировать
+
+def _load_numpy() -> bool:
+    global np, HAS_NUMPY
+    if HAS_NUMPY is None:
+        try:
+            import numpy as _np
+            np = _np
+            HAS_NUMPY = True
+        except Exception:
+            HAS_NUMPY = False
+    return HAS_NUMPY
+
+_POOL_SIZE = 1024  # степень двойки: индекс заворачиваем маской
+
+
+def _split_compound(cmd: str):
+    """'A;:B?' -> ['A', 'B?'] — делим по ';' вне кавычек, ведущий ':' убираем."""
+    parts, buf, quote = [], [], None
+    for c in cmd:
+        if quote:
+            buf.append(c)
+            if c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+            buf.append(c)
+        elif c == ";":
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(c)
+    parts.append("".join(buf))
+    return [p.strip().lstrip(":") for p in parts if p.strip()]
+
 
 class FakeMeter:
     """Симулятор с тем же интерфейсом, что и VisaMeter.
@@ -7,11 +45,15 @@ class FakeMeter:
        READ -> случайные значения в диапазоне [-50; -40] dBm.
     """
     def __init__(self, *_args, **_kwargs):
-        self._lock = threading.RLock()
         self.inst = True
         self.resource = "FAKE"
         self.backend_in_use = "FAKE"
         self._freq_hz = 1_000_000_000  # 1 ГГц по умолчанию
+        self._freq_str = str(self._freq_hz)
+        # пул случайных значений: генерируем пачкой, отдаём по индексу
+        self._rng = np.random.default_rng() if _load_numpy() else None
+        self._pool = self._new_pool() if self._rng is not None else None
+        self._i = 0
 
     def is_connected_to(self, resource: str) -> bool:
         return self.inst is not None and resource.upper() == "FAKE"
@@ -25,22 +67,74 @@ class FakeMeter:
     def close(self):
         self.inst = None
 
+    def _new_pool(self):
+        return self._rng.uniform(-50.0, -40.0, _POOL_SIZE).tolist()
+
     def _random_dbm(self) -> float:
-        return random.uniform(-50.0, -40.0)
+        if self._pool is None:
+            return random.uniform(-50.0, -40.0)
+        val = self._pool[self._i]
+        self._i = (self._i + 1) & (_POOL_SIZE - 1)
+        if self._i == 0:
+            self._pool = self._new_pool()
+        return val
 
     def query(self, cmd: str) -> str:
-        cmdu = cmd.strip().upper()
-        if cmdu.startswith("*IDN?"):
-            return "FAKE,USB Power Sensor Simulator,0,1.0"
-        if cmdu.startswith("MEAS:POW?") or cmdu.startswith("READ?") or cmdu.startswith("FETC:POW?"):
-            return f"{self._random_dbm():.3f}"
-        if cmdu.startswith("SENS:FREQ?") or cmdu.startswith("FREQ?"):
-            return str(self._freq_hz)
+        if ";" in cmd:
+            # составная команда: выполняем по очереди, ответы склеиваем через ';'
+            out = []
+            for part in _split_compound(cmd):
+                if "?" in part:
+                    resp = self._query_one(part)
+                    if resp:
+                        out.append(resp)
+                else:
+                    self.write(part)
+            return ";".join(out)
+        return self._query_one(cmd)
+
+    def _reply_idn(self) -> str:
+        return "FAKE,USB Power Sensor Simulator,0,1.0"
+
+    def _reply_power(self) -> str:
+        return f"{self._random_dbm():.3f}"
+
+    def _reply_freq(self) -> str:
+        return self._freq_str
+
+    # префикс запроса -> обработчик (проверяются по порядку)
+    _QUERY_HANDLERS = (
+        ("*IDN?", _reply_idn),
+        ("MEAS:POW?", _reply_power),
+        ("READ?", _reply_power),
+        ("FETC:POW?", _reply_power),
+        ("SENS:FREQ?", _reply_freq),
+        ("FREQ?", _reply_freq),
+    )
+
+    def _query_one(self, cmd: str) -> str:
+        cmdu = cmd.strip()
+        if not cmdu.isupper():
+            cmdu = cmdu.upper()
+        for prefix, handler in self._QUERY_HANDLERS:
+            if cmdu.startswith(prefix):
+                return handler(self)
         # неизвестные запросы просто эхо
         return "0"
 
+    def with_timeout(self, ms: int):
+        return nullcontext()  # симулятору таймауты не нужны
+
+    def query_bytes(self, cmd_bytes: bytes) -> bytes:
+        return (self.query(cmd_bytes.decode("ascii")) + "\n").encode("ascii")
+
+    def write_bytes(self, cmd_bytes: bytes):
+        self.write(cmd_bytes.decode("ascii"))
+
     def write(self, cmd: str):
-        cmdu = cmd.strip().upper()
+        cmdu = cmd.strip()
+        if not cmdu.isupper():
+            cmdu = cmdu.upper()
         if cmdu.startswith("SENS:POW:ZERO:IMM") or cmdu.startswith("CAL:ZERO"):
             return  # no-op
         if cmdu.startswith("SENS:FREQ ") or cmdu.startswith("FREQ "):
@@ -49,6 +143,7 @@ class FakeMeter:
                 parts = cmdu.split()
                 val = int(parts[-1])
                 self._freq_hz = val
+                self._freq_str = str(val)
             except Exception:
                 pass
         # иные команды игнорируем
@@ -1,16 +1,28 @@
+import logging
 import threading
+from contextlib import contextmanager
 
-try:
-    import pyvisa
-    HAS_VISA = True
-except Exception:
-    pyvisa = None
-    HAS_VISA = False
+# pyvisa импортируется лениво, при первом обращении
+pyvisa = None
+HAS_VISA = None   # None — ещё не пробовали импортировать
+
+log = logging.getLogger(__name__)
+
+def _load_visa() -> bool:
+    global pyvisa, HAS_VISA
+    if HAS_VISA is None:
+        try:
+            import pyvisa as _pyvisa
+            pyvisa = _pyvisa
+            HAS_VISA = True
+        except Exception:
+            HAS_VISA = False
+    return HAS_VISA
 
 class VisaMeter:
     """Реализация «как в исходнике»: query/write/idn/connect/is_connected_to/close."""
     def __init__(self, backend_order, read_term="\n", write_term="\n"):
-        if not HAS_VISA:
+        if not _load_visa():
             raise RuntimeError("PyVISA не установлен")
         self.backend_order = backend_order
         self.rm = None
@@ -19,7 +31,8 @@ class VisaMeter:
         self.backend_in_use = None
         self.read_term = read_term
         self.write_term = write_term
-        self._lock = threading.RLock()
+        self._lock = threading.RLock()     # состояние (inst/resource); close() ждёт только его
+        self._io_lock = threading.RLock()  # обмен целиком: write+read одного запроса не разрывать
 
     def _close_unlocked(self):
         if self.inst:
@@ -35,25 +48,36 @@ class VisaMeter:
     def is_connected_to(self, resource: str) -> bool:
         return self.inst is not None and self.resource == resource
 
-    def connect(self, resource: str, timeout_ms: int = 5000):
-        """Идемпотентный connect: повтор на тот же ресурс — просто ОК."""
+    def connect(self, resource: str, timeout_ms: int = 5000, clear_on_connect: bool = True,
+                preferred_backend=None):
+        """Идемпотентный connect: повтор на тот же ресурс — просто ОК.
+        clear() (USBTMC INITIATE_CLEAR) делаем только на новом ресурсе:
+        на повторном открытии того же устройства он лишь провоцирует таймауты.
+        preferred_backend (из скана) пробуем первым — без лишних неудачных open."""
         with self._lock:
             if self.is_connected_to(resource):
                 return
             self._close_unlocked()
 
+            order = self.backend_order
+            if preferred_backend is not None:
+                order = [preferred_backend] + [b for b in order if b != preferred_backend]
+
             last_err = None
-            for be in self.backend_order:
+            for be in order:
                 try:
                     self.rm = pyvisa.ResourceManager(be) if be else pyvisa.ResourceManager()
                     self.inst = self.rm.open_resource(resource)
                     self.inst.timeout = timeout_ms
                     self.inst.read_termination = self.read_term
                     self.inst.write_termination = self.write_term
-                    try:
-                        self.inst.clear()
-                    except Exception:
-                        pass
+                    if clear_on_connect:
+                        try:
+                            self.inst.clear()
+                        except Exception:
+                            pass
+                    else:
+                        log.debug("connect: clear() пропущен для %s", resource)
                     self.backend_in_use = be or "default"
                     self.resource = resource
                     return
@@ -69,15 +93,56 @@ class VisaMeter:
 
     def query(self, cmd: str) -> str:
         with self._lock:
-            if not self.inst:
+            inst = self.inst
+            if not inst:
                 raise RuntimeError("Нет соединения")
-            return self.inst.query(cmd)
+        with self._io_lock:
+            return inst.query(cmd)
 
     def write(self, cmd: str):
         with self._lock:
-            if not self.inst:
+            inst = self.inst
+            if not inst:
+                raise RuntimeError("Нет соединения")
+        with self._io_lock:
+            return inst.write(cmd)
+
+    @contextmanager
+    def with_timeout(self, ms: int):
+        """Временно меняет таймаут VISA (короткий — для опроса), потом возвращает прежний.
+        Держит I/O-замок весь блок: чужой запрос с коротким таймаутом не выполнится."""
+        inst = self.inst
+        if not inst:
+            yield
+            return
+        with self._io_lock:
+            old = inst.timeout
+            inst.timeout = ms
+            try:
+                yield
+            finally:
+                try:
+                    inst.timeout = old
+                except Exception:
+                    pass
+
+    def query_bytes(self, cmd_bytes: bytes) -> bytes:
+        """Запрос в обход текстового слоя pyvisa: cmd_bytes уже с терминатором."""
+        with self._lock:
+            inst = self.inst
+            if not inst:
+                raise RuntimeError("Нет соединения")
+        with self._io_lock:
+            inst.write_raw(cmd_bytes)
+            return inst.read_raw()
+
+    def write_bytes(self, cmd_bytes: bytes):
+        with self._lock:
+            inst = self.inst
+            if not inst:
                 raise RuntimeError("Нет соединения")
-            return self.inst.write(cmd)
+        with self._io_lock:
+            return inst.write_raw(cmd_bytes)
 
     def idn(self) -> str:
         try:
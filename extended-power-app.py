@@ -8,12 +8,10 @@ PowerMeter GUI (PyVISA, tkinter) с автообнаружением USBTMC:
 - Работает через системный VISA и/или pyvisa-py (@py) — оба сканируются.
 """
 
-import threading, queue, time, re, sys
+import threading, re, sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List
 import tkinter.font as tkfont
-import threading, re
-
-
 
 try:
     import tkinter as tk
@@ -33,17 +31,26 @@ SCPI_QUERY_POWER = "MEAS:POW?"
 SCPI_ZERO        = "SENS:POW:ZERO:IMM"
 SCPI_QUERY_FREQ  = "SENS:FREQ?"
 SCPI_SET_FREQ    = "SENS:FREQ {freq}"
+_SET_FREQ_PREFIX, _SET_FREQ_SUFFIX = SCPI_SET_FREQ.split("{freq}")  # шаблон режем один раз
 
 # Если хочешь сразу подставлять свой адрес — впиши сюда (иначе оставить пустым "")
 PREFERRED_USB = ""   # пример: "USB0::0x3399::0x3800::QWNJ013507::INSTR"
 
-try:
-    import pyvisa
-    HAS_VISA = True
-except Exception as e:
-    HAS_VISA = False
-    pyvisa = None
-    print("[!] PyVISA не установлен:", e, file=sys.stderr)
+# PyVISA импортируем лениво (при первом скане/подключении) — холодный старт быстрее
+pyvisa = None
+HAS_VISA = None   # None — ещё не пробовали импортировать
+
+def _load_visa() -> bool:
+    global pyvisa, HAS_VISA
+    if HAS_VISA is None:
+        try:
+            import pyvisa as _pyvisa
+            pyvisa = _pyvisa
+            HAS_VISA = True
+        except Exception as e:
+            HAS_VISA = False
+            print("[!] PyVISA не установлен:", e, file=sys.stderr)
+    return HAS_VISA
 
 
 # ===== Вспомогательные =====
@@ -68,7 +75,7 @@ def scan_usb_usbtmc(backends: List[str]) -> List[str]:
     """Сканируем ТОЛЬКО USBTMC (USB?*::INSTR) по нескольким бэкендам и объединяем без дублей."""
     addrs: List[str] = []
     seen = set()
-    if not HAS_VISA:
+    if not _load_visa():
         return addrs
     for be in backends:
         try:
@@ -87,7 +94,7 @@ def scan_usb_usbtmc(backends: List[str]) -> List[str]:
 # ===== Класс прибора =====
 class VisaMeter:
     def __init__(self, backend_order):
-        if not HAS_VISA:
+        if not _load_visa():
             raise RuntimeError("PyVISA не установлен")
         self.backend_order = backend_order
         self.rm = None
@@ -178,12 +185,14 @@ class App(tk.Tk):
         self.BASE_W, self.BASE_H = 1280, 720
         self._font_objs = {}          # сюда положим шрифты
         self._resize_job = None       # дебаунс на ресайз
+        self._screen_wh = None        # размер экрана не меняется — читаем один раз
+        self._scale = None            # последний применённый масштаб
 
         # логика
         self.meter = VisaMeter(DEFAULT_BACKENDS)
-        self.read_queue = queue.Queue()
-        self.stop_flag = threading.Event()
-        self.poll_thread = None
+        self._executor = ThreadPoolExecutor(max_workers=1)   # блокирующий VISA-запрос — вне Tk-потока
+        self._after_id = None
+        self._poll_gen = 0            # поколение опроса: старые ответы после stop/start игнорируем
         self.peak_value = None
 
         # UI
@@ -198,12 +207,16 @@ class App(tk.Tk):
 
     # ---------- масштабирование ----------
     def _calc_scale(self):
-        w = self.winfo_screenwidth()
-        h = self.winfo_screenheight()
+        if self._screen_wh is None:
+            self._screen_wh = (self.winfo_screenwidth(), self.winfo_screenheight())
+        w, h = self._screen_wh
         return min(w / self.BASE_W, h / self.BASE_H)
 
     def _apply_scale(self):
         s = self._calc_scale()
+        if self._scale is not None and abs(s - self._scale) / self._scale < 0.01:
+            return  # масштаб почти не изменился (< 1 %) — шрифты/стили не трогаем
+        self._scale = s
 
         # создаём/обновляем шрифты
         def mk(name, **kw):
@@ -233,11 +246,14 @@ class App(tk.Tk):
         self.cmb_found.configure(font=font_norm)
         self.ent_freq.configure(font=font_norm)
 
-    def _on_configure(self, _evt):
+    def _on_configure(self, evt):
+        # <Configure> корня приходит и от каждого дочернего виджета — их пропускаем
+        if evt.widget is not self:
+            return
         # дебаунс, чтобы не пересчитывать шрифты на каждое движение
         if self._resize_job:
             self.after_cancel(self._resize_job)
-        self._resize_job = self.after(150, self._apply_scale)
+        self._resize_job = self.after(250, self._apply_scale)
 
     def _toggle_fullscreen(self, _=None):
         self.attributes("-fullscreen", not self.attributes("-fullscreen"))
@@ -251,10 +267,11 @@ class App(tk.Tk):
 
         # Connection
         frm_conn = ttk.LabelFrame(self, text="Connection")
-        frm_conn.pack(fill="x", expand=False, **pad)
+        frm_conn.grid(row=0, column=0, sticky="ew", **pad)
 
         ttk.Label(frm_conn, text="Resource:").grid(row=0, column=0, sticky="w")
-        self.res_entry = ttk.Entry(frm_conn)
+        self._res_var = tk.StringVar()
+        self.res_entry = ttk.Entry(frm_conn, textvariable=self._res_var)
         self.res_entry.grid(row=0, column=1, sticky="we", padx=6)
         self.btn_connect = ttk.Button(frm_conn, text="Connect", command=self.on_connect)
         self.btn_connect.grid(row=0, column=2, sticky="e")
@@ -275,7 +292,7 @@ class App(tk.Tk):
 
         # Readings
         frm_vals = ttk.LabelFrame(self, text="Readings")
-        frm_vals.pack(fill="x", expand=False, **pad)
+        frm_vals.grid(row=1, column=0, sticky="ew", **pad)
 
         ttk.Label(frm_vals, text="Current Power:").grid(row=0, column=0, sticky="w")
         self.lbl_curr = ttk.Label(frm_vals, text="—", style="Value.TLabel")
@@ -287,7 +304,7 @@ class App(tk.Tk):
 
         # Controls
         frm_ctrl = ttk.LabelFrame(self, text="Controls")
-        frm_ctrl.pack(fill="x", expand=False, **pad)
+        frm_ctrl.grid(row=2, column=0, sticky="ew", **pad)
 
         ttk.Label(frm_ctrl, text="Freq (Hz):").grid(row=0, column=0, sticky="w")
         self.ent_freq = ttk.Entry(frm_ctrl, width=24)
@@ -298,17 +315,20 @@ class App(tk.Tk):
 
         # Status
         self.status = ttk.Label(self, text="Ready", relief="sunken", anchor="w")
-        self.status.pack(fill="x", padx=12, pady=(0, 12))
+        self.status.grid(row=3, column=0, sticky="sew", padx=12, pady=(0, 12))
+
+        # одна сетка на всё окно: растягиваем колонку, статус прижат к низу
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(3, weight=1)
 
     # ---------- остальной код (скан/коннект/опрос) ----------
     # НИЖЕ — без изменений относительно твоей текущей версии
     def on_scan(self):
         addrs = scan_usb_usbtmc(DEFAULT_BACKENDS)
-        self.cmb_found["values"] = addrs
+        self.cmb_found.configure(values=tuple(addrs))
         if addrs:
             self.cmb_found.current(0)
-            self.res_entry.delete(0, tk.END)
-            self.res_entry.insert(0, addrs[0])
+            self._res_var.set(addrs[0])
             self.status.configure(text=f"Found {len(addrs)} USBTMC device(s).")
         else:
             self.status.configure(text="USBTMC не найдены.")
@@ -316,13 +336,11 @@ class App(tk.Tk):
     def on_pick_found(self, _evt=None):
         v = self.cmb_found.get().strip()
         if v:
-            self.res_entry.delete(0, tk.END)
-            self.res_entry.insert(0, v)
+            self._res_var.set(v)
 
     def _auto_scan_and_connect(self):
         if PREFERRED_USB.strip():
-            self.res_entry.delete(0, tk.END)
-            self.res_entry.insert(0, PREFERRED_USB.strip())
+            self._res_var.set(PREFERRED_USB.strip())
             self.on_connect()
             return
         self.on_scan()
@@ -385,55 +403,56 @@ class App(tk.Tk):
             hz = parse_float(val)
             if hz is None:
                 raise ValueError(f"Не удалось распознать частоту: {val}")
-            self.meter.write(SCPI_SET_FREQ.format(freq=int(hz)))
+            self.meter.write(f"{_SET_FREQ_PREFIX}{int(hz)}{_SET_FREQ_SUFFIX}")
             self.status.configure(text=f"Freq set: {val} → {int(hz)} Hz")
         except Exception as e:
             self.status.configure(text=f"Freq set error: {e}")
             messagebox.showerror("Freq set error", str(e))
 
     def _start_polling(self):
-        self.stop_flag.clear()
-        self.poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
-        self.poll_thread.start()
-        self.after(100, self._drain_queue)
+        self._stop_polling()
+        self._schedule_poll(self._poll_gen)
 
     def _stop_polling(self):
-        self.stop_flag.set()
-        if self.poll_thread and self.poll_thread.is_alive():
-            self.poll_thread.join(timeout=1.0)
-        self.poll_thread = None
+        self._poll_gen += 1
+        if self._after_id:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule_poll(self, gen):
+        self._after_id = None
+        if gen != self._poll_gen:
+            return
+        fut = self._executor.submit(self.meter.query, SCPI_QUERY_POWER)
+        fut.add_done_callback(lambda f: self._post_reading(gen, f))
 
-    def _poll_loop(self):
-        while not self.stop_flag.is_set():
-            try:
-                raw = self.meter.query(SCPI_QUERY_POWER)
-                val = parse_float(raw)
-                self.read_queue.put(("ok", val, raw.strip()))
-            except Exception as e:
-                self.read_queue.put(("err", None, str(e)))
-            time.sleep(POLL_PERIOD_S)
-
-    def _drain_queue(self):
+    def _post_reading(self, gen, fut):
+        # вызывается в рабочем потоке — передаём результат в Tk-поток
         try:
-            while True:
-                kind, val, payload = self.read_queue.get_nowait()
-                if kind == "ok":
-                    if val is not None:
-                        self.lbl_curr.configure(text=f"{val}")
-                        if self.peak_value is None or val > self.peak_value:
-                            self.peak_value = val
-                            self.lbl_peak.configure(text=f"{self.peak_value}")
-                    else:
-                        self.lbl_curr.configure(text=payload)
-                else:
-                    self.status.configure(text=f"Read error: {payload}")
-        except queue.Empty:
-            pass
-        if not self.stop_flag.is_set():
-            self.after(100, self._drain_queue)
+            self.after(0, self._on_reading, gen, fut)
+        except (RuntimeError, tk.TclError):
+            pass  # окно уже закрыто
+
+    def _on_reading(self, gen, fut):
+        if gen != self._poll_gen:
+            return
+        try:
+            raw = fut.result()
+            val = parse_float(raw)
+            if val is not None:
+                self.lbl_curr.configure(text=f"{val}")
+                if self.peak_value is None or val > self.peak_value:
+                    self.peak_value = val
+                    self.lbl_peak.configure(text=f"{self.peak_value}")
+            else:
+                self.lbl_curr.configure(text=raw.strip())
+        except Exception as e:
+            self.status.configure(text=f"Read error: {e}")
+        self._after_id = self.after(int(POLL_PERIOD_S * 1000), self._schedule_poll, gen)
 
     def destroy(self):
         self._stop_polling()
+        self._executor.shutdown(wait=False)
         try:
             self.meter.close()
         except Exception:
@@ -8,8 +8,10 @@ PowerMeter GUI (PyVISA, tkinter) с автообнаружением USBTMC:
 - Работает через системный VISA и/или pyvisa-py (@py) — оба сканируются.
 """
 
-import threading, queue, time, re, sys
-from typing import Optional, List
+import threading, re, sys
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Tuple
 
 try:
     import tkinter as tk
@@ -21,6 +23,9 @@ except Exception as e:
 # ===== Настройки =====
 DEFAULT_BACKENDS = ["@py", ""]   # сперва pyvisa-py (без NI), затем системный VISA (если вдруг есть)
 POLL_PERIOD_S = 0.3
+POLL_IDLE_MAX_FACTOR = 10   # во сколько раз максимум растягиваем период опроса
+POLL_STEADY_TOL = 0.01      # изменение меньше этого считаем «сигнал стоит»
+POLL_TIMEOUT_MS = 500       # таймаут VISA для опроса (connect/IDN/Set — обычные 5000 мс)
 READ_TERM = "\n"
 WRITE_TERM = "\n"
 
@@ -29,6 +34,7 @@ SCPI_QUERY_POWER = "MEAS:POW?"
 SCPI_ZERO        = "SENS:POW:ZERO:IMM"
 SCPI_QUERY_FREQ  = "SENS:FREQ?"
 SCPI_SET_FREQ    = "SENS:FREQ {freq}"
+_SET_FREQ_PREFIX, _SET_FREQ_SUFFIX = SCPI_SET_FREQ.split("{freq}")  # шаблон режем один раз
 
 # Если хочешь сразу подставлять свой адрес — впиши сюда (иначе оставить пустым "")
 PREFERRED_USB = ""   # пример: "USB0::0x3399::0x3800::QWNJ013507::INSTR"
@@ -42,34 +48,83 @@ except Exception as e:
     print("[!] PyVISA не установлен:", e, file=sys.stderr)
 
 
+# ResourceManager'ы по backend'ам: создание RM (особенно @py) обходит USB-шину,
+# поэтому создаём один раз и переиспользуем в скане и при подключении.
+_RM_CACHE = {}
+
+def _get_rm(be: str):
+    rm = _RM_CACHE.get(be)
+    if rm is None:
+        rm = pyvisa.ResourceManager(be) if be else pyvisa.ResourceManager()  # важно: без None
+        _RM_CACHE[be] = rm
+    return rm
+
+def _drop_rm(be: str):
+    rm = _RM_CACHE.pop(be, None)
+    if rm is not None:
+        try:
+            rm.close()
+        except Exception:
+            pass
+
+def _rm_is_dead(e: Exception) -> bool:
+    """Ошибка от самого RM (закрыт, сессия недействительна), а не «ресурс не найден»."""
+    if isinstance(e, pyvisa.errors.InvalidSession):
+        return True
+    return (isinstance(e, pyvisa.errors.VisaIOError)
+            and e.error_code == pyvisa.constants.StatusCode.error_invalid_object)
+
+
 # ===== Вспомогательные =====
+_FLOAT_RE = re.compile(r"[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
 def parse_float(text: str) -> Optional[float]:
-    if text is None:
+    if not text:
         return None
-    m = re.search(r"[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?", text.strip())
+    m = _FLOAT_RE.search(text)
     return float(m.group(0)) if m else None
 
+def _scan_one(be: str) -> List[str]:
+    try:
+        res = _get_rm(be).list_resources("USB?*::INSTR")
+        print(f"[scan] backend {be or 'default'} -> {res or 'нет'}")
+        return list(res)
+    except Exception as e:
+        # close() RM закрыл бы и открытый через него прибор — выкидываем только мёртвый
+        if _rm_is_dead(e):
+            _drop_rm(be)
+        print(f"[scan] backend {be or 'default'} ошибка: {e}")
+        return []
+
 def scan_usb_usbtmc(backends: List[str]) -> List[str]:
     """Сканируем ТОЛЬКО USBTMC (USB?*::INSTR) по нескольким бэкендам и объединяем без дублей."""
-    addrs: List[str] = []
+    return [r for r, _be in scan_usb_usbtmc_with_backends(backends)]
+
+def scan_usb_usbtmc_with_backends(backends: List[str]) -> List[Tuple[str, str]]:
+    """То же, но пары (ресурс, бэкенд, который его увидел первым) — подсказка для connect."""
+    addrs: List[Tuple[str, str]] = []
     seen = set()
     if not HAS_VISA:
         return addrs
-    for be in backends:
-        try:
-            rm = pyvisa.ResourceManager(be) if be else pyvisa.ResourceManager()
-            res = rm.list_resources("USB?*::INSTR")
-            print(f"[scan] backend {be or 'default'} -> {res or 'нет'}")
-            for r in res:
-                if r not in seen:
-                    seen.add(r)
-                    addrs.append(r)
-        except Exception as e:
-            print(f"[scan] backend {be or 'default'} ошибка: {e}")
+    # бэкенды независимы — опрашиваем параллельно, порядок сохраняем как в списке
+    results: List[List[str]] = [[] for _ in backends]
+    with ThreadPoolExecutor(max_workers=max(1, len(backends))) as ex:
+        futures = {ex.submit(_scan_one, be): i for i, be in enumerate(backends)}
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+    for be, res in zip(backends, results):
+        for r in res:
+            if r not in seen:
+                seen.add(r)
+                addrs.append((r, be))
     return addrs
 
 
 # ===== Класс прибора =====
+def _not_connected(*_args, **_kwargs):
+    raise RuntimeError("Не подключено")
+
+
 class VisaMeter:
     def __init__(self, backend_order: List[str]):
         if not HAS_VISA:
@@ -79,13 +134,31 @@ class VisaMeter:
         self.inst = None
         self.backend_in_use = None
         self.resource = None
-
-    def connect(self, resource: str) -> None:
+        # связанные методы inst.query/inst.write (после connect) — без поиска атрибутов на каждый опрос
+        self._query = _not_connected
+        self._write = _not_connected
+        self._io_lock = threading.RLock()  # обмен с прибором: опрос и Get/Set не перемешиваем
+
+    def connect(self, resource: str, preferred_backend: Optional[str] = None) -> None:
+        # бэкенд, на котором скан нашёл ресурс, пробуем первым
+        order = self.backend_order
+        if preferred_backend is not None:
+            order = [preferred_backend] + [b for b in order if b != preferred_backend]
         last_err = None
-        for be in self.backend_order:
+        for be in order:
             try:
-                rm = pyvisa.ResourceManager(be) if be else pyvisa.ResourceManager()  # важно: без None
-                inst = rm.open_resource(resource)
+                cached = be in _RM_CACHE
+                rm = _get_rm(be)
+                try:
+                    inst = rm.open_resource(resource)
+                except Exception as e:
+                    # «ресурса на этом backend'е нет» — норма; свежий RM нужен,
+                    # только если закэшированный сам «протух»
+                    if not (cached and _rm_is_dead(e)):
+                        raise
+                    _drop_rm(be)
+                    rm = _get_rm(be)
+                    inst = rm.open_resource(resource)
                 inst.read_termination = READ_TERM
                 inst.write_termination = WRITE_TERM
                 inst.timeout = 5000
@@ -93,6 +166,8 @@ class VisaMeter:
                 self.inst = inst
                 self.backend_in_use = be
                 self.resource = resource
+                self._query = inst.query
+                self._write = inst.write
                 return
             except Exception as e:
                 last_err = e
@@ -106,16 +181,42 @@ class VisaMeter:
             self.inst = None
             self.rm = None
             self.resource = None
+            self._query = _not_connected
+            self._write = _not_connected
 
     def query(self, cmd: str) -> str:
-        if not self.inst:
-            raise RuntimeError("Не подключено")
-        return self.inst.query(cmd)
+        with self._io_lock:
+            return self._query(cmd)
 
     def write(self, cmd: str) -> None:
-        if not self.inst:
-            raise RuntimeError("Не подключено")
-        self.inst.write(cmd)
+        with self._io_lock:
+            self._write(cmd)
+
+    @contextmanager
+    def with_timeout(self, ms: int):
+        """Временно меняет таймаут VISA (короткий — для опроса), потом возвращает прежний.
+        Держит I/O-замок весь блок: чужой запрос с коротким таймаутом не выполнится."""
+        inst = self.inst
+        if not inst:
+            yield
+            return
+        with self._io_lock:
+            old = inst.timeout
+            inst.timeout = ms
+            try:
+                yield
+            finally:
+                try:
+                    inst.timeout = old
+                except Exception:
+                    pass
+
+    def query_many(self, cmds) -> List[str]:
+        """Несколько запросов за один round trip: ['A?', 'B?'] -> 'A?;:B?' -> ['a', 'b']."""
+        if len(cmds) == 1:
+            return [self.query(cmds[0])]
+        resp = self.query(";:".join(cmds))
+        return [p.strip() for p in resp.split(";")]
 
     def idn(self) -> str:
         try:
@@ -133,12 +234,25 @@ class App(tk.Tk):
         self.resizable(False, False)
 
         self.meter = VisaMeter(DEFAULT_BACKENDS)
-        self.read_queue = queue.Queue()
+        self._latest = None           # последний результат опроса (важен только он)
+        self._latest_lock = threading.Lock()
+        self._watchdog_job = None
+        self._scan_busy = False
+        self._scan_result = None
+        self._scan_then_connect = False
+        self._resource_backend_hint = {}   # ресурс -> бэкенд из последнего скана
         self.stop_flag = threading.Event()
         self.poll_thread = None
         self.peak_value = None
+        self._last_curr_text = None   # что уже выведено в метках — повтор не отправляем в Tk
+        self._last_peak_text = None
+        self._idle_factor = 1         # множитель периода опроса (адаптивный)
+        self._last_val = None
+        self._hidden = False          # окно свёрнуто (ставится по <Map>/<Unmap>)
 
         self._build_ui()
+        self.bind("<Unmap>", lambda e: self._set_hidden(e, True))
+        self.bind("<Map>", lambda e: self._set_hidden(e, False))
         self.after(200, self._auto_scan_and_connect)
 
     def _build_ui(self):
@@ -192,10 +306,41 @@ class App(tk.Tk):
         self.status = ttk.Label(self, text="Ready", relief="sunken", anchor="w")
         self.status.pack(fill="x", padx=8, pady=(0, 8))
 
+        self.bind("<<PowerSample>>", lambda e: self._drain_queue())
+        self.bind("<<ScanDone>>", self._on_scan_done)
+
     # ---- Scan & Auto ----
     def on_scan(self):
-        addrs = scan_usb_usbtmc(DEFAULT_BACKENDS)
-        self.cmb_found["values"] = addrs
+        self._start_scan()
+
+    def _start_scan(self, then_connect: bool = False):
+        # скан идёт в фоне: libusb-перечисление не должно морозить окно
+        if self._scan_busy:
+            return
+        self._scan_busy = True
+        self._scan_then_connect = then_connect
+        self.btn_scan.configure(state="disabled")
+        self.status.configure(text="Scanning…")
+        threading.Thread(target=self._scan_worker, daemon=True).start()
+
+    def _scan_worker(self):
+        try:
+            addrs = scan_usb_usbtmc_with_backends(DEFAULT_BACKENDS)
+        except Exception:
+            addrs = []
+        self._scan_result = addrs
+        try:
+            self.event_generate("<<ScanDone>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            pass  # окно уже закрыто
+
+    def _on_scan_done(self, _evt=None):
+        found, self._scan_result = self._scan_result or [], None
+        self._resource_backend_hint = dict(found)
+        addrs = [r for r, _be in found]
+        self._scan_busy = False
+        self.btn_scan.configure(state="normal")
+        self.cmb_found.configure(values=tuple(addrs))
         if addrs:
             self.cmb_found.current(0)
             self.res_entry.delete(0, tk.END)
@@ -203,6 +348,12 @@ class App(tk.Tk):
             self.status.configure(text=f"Found {len(addrs)} USBTMC device(s).")
         else:
             self.status.configure(text="USBTMC не найдены.")
+        if self._scan_then_connect:
+            self._scan_then_connect = False
+            if addrs:
+                self.on_connect()
+            else:
+                self.status.configure(text="USBTMC не найдены. Нажми Scan или введи адрес вручную.")
 
     def on_pick_found(self, _evt=None):
         v = self.cmb_found.get().strip()
@@ -216,11 +367,7 @@ class App(tk.Tk):
             self.res_entry.insert(0, PREFERRED_USB.strip())
             self.on_connect()
             return
-        self.on_scan()
-        if self.cmb_found["values"]:
-            self.on_connect()
-        else:
-            self.status.configure(text="USBTMC не найдены. Нажми Scan или введи адрес вручную.")
+        self._start_scan(then_connect=True)
 
     # ---- Connect / Controls ----
     def on_connect(self):
@@ -229,13 +376,15 @@ class App(tk.Tk):
             messagebox.showwarning("Power Meter", "Введите строку ресурса (USB0::...::INSTR).")
             return
         self._stop_polling()
+        self.meter.close()
         try:
-            self.meter.connect(res)
+            self.meter.connect(res, preferred_backend=self._resource_backend_hint.get(res))
             self.backend_label.configure(text=self.meter.backend_in_use or "default")
             idn = self.meter.idn()
             self.status.configure(text=f"Connected: {res}{(' | IDN: ' + idn.strip()) if idn else ''}")
             self.peak_value = None
             self.lbl_peak.configure(text="—")
+            self._last_peak_text = None
             self._start_polling()
         except Exception as e:
             self.status.configure(text=f"Connect error: {e}")
@@ -247,6 +396,7 @@ class App(tk.Tk):
             self.status.configure(text="Zero sent")
             self.peak_value = None
             self.lbl_peak.configure(text="—")
+            self._last_peak_text = None
         except Exception as e:
             self.status.configure(text=f"Zero error: {e}")
             messagebox.showerror("Zero error", str(e))
@@ -267,7 +417,7 @@ class App(tk.Tk):
             messagebox.showwarning("Set Freq", "Введите частоту (Гц).")
             return
         try:
-            self.meter.write(SCPI_SET_FREQ.format(freq=val))
+            self.meter.write(f"{_SET_FREQ_PREFIX}{val}{_SET_FREQ_SUFFIX}")
             self.status.configure(text=f"Freq set: {val}")
         except Exception as e:
             self.status.configure(text=f"Freq set error: {e}")
@@ -275,45 +425,89 @@ class App(tk.Tk):
 
     # ---- Polling ----
     def _start_polling(self):
-        self.stop_flag.clear()
-        self.poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+        # свой флаг на каждый поток: прежний (если ещё висит в query) завершится сам
+        self.stop_flag = threading.Event()
+        self._idle_factor = 1
+        self._last_val = None
+        self.poll_thread = threading.Thread(target=self._poll_loop, args=(self.stop_flag,), daemon=True)
         self.poll_thread.start()
-        self.after(100, self._drain_queue)
+        if self._watchdog_job:
+            self.after_cancel(self._watchdog_job)
+        self._watchdog_job = self.after(1000, self._watchdog)
 
     def _stop_polling(self):
         self.stop_flag.set()
+        # не ждём поток, висящий в query: закрытие ресурса в on_connect его разбудит
         if self.poll_thread and self.poll_thread.is_alive():
-            self.poll_thread.join(timeout=1.0)
+            self.poll_thread.join(timeout=0.05)
         self.poll_thread = None
 
-    def _poll_loop(self):
-        while not self.stop_flag.is_set():
+    def _poll_loop(self, stop: threading.Event):
+        q, cmd = self.meter._query, SCPI_QUERY_POWER  # горячий путь: один вызов на опрос
+        while not stop.is_set():
+            val = None
             try:
-                raw = self.meter.query(SCPI_QUERY_POWER)
+                with self.meter.with_timeout(POLL_TIMEOUT_MS):
+                    raw = q(cmd)
+                if stop.is_set():
+                    break  # поток устарел (переподключились) — ответ старого прибора не публикуем
                 val = parse_float(raw)
-                self.read_queue.put(("ok", val, raw.strip()))
+                # пик считаем здесь: промежуточные отсчёты в слот не попадут
+                if val is not None and (self.peak_value is None or val > self.peak_value):
+                    self.peak_value = val
+                item = ("ok", val, raw.strip())
             except Exception as e:
-                self.read_queue.put(("err", None, str(e)))
-            time.sleep(POLL_PERIOD_S)
+                if stop.is_set():
+                    break  # ошибка из-за закрытия ресурса при переподключении
+                item = ("err", None, str(e))
+            with self._latest_lock:
+                self._latest = item
+            # будим Tk событием, а не таймером (event_generate потокобезопасен)
+            try:
+                self.event_generate("<<PowerSample>>", when="tail")
+            except (RuntimeError, tk.TclError):
+                break  # окно уже закрыто
+            if stop.wait(self._next_poll_delay(val)):
+                break
+
+    def _set_hidden(self, evt, hidden: bool):
+        if evt.widget is self:  # Map/Unmap дочерних виджетов нас не интересуют
+            self._hidden = hidden
+
+    def _next_poll_delay(self, val):
+        """Пауза до следующего опроса: на стабильном сигнале и в свёрнутом окне — реже."""
+        if val is not None and self._last_val is not None and abs(val - self._last_val) <= POLL_STEADY_TOL:
+            self._idle_factor = min(self._idle_factor * 2, POLL_IDLE_MAX_FACTOR)
+        else:
+            self._idle_factor = 1
+        self._last_val = val
+        return POLL_PERIOD_S * (POLL_IDLE_MAX_FACTOR if self._hidden else self._idle_factor)
 
     def _drain_queue(self):
-        try:
-            while True:
-                kind, val, payload = self.read_queue.get_nowait()
-                if kind == "ok":
-                    if val is not None:
-                        self.lbl_curr.configure(text=f"{val}")
-                        if self.peak_value is None or val > self.peak_value:
-                            self.peak_value = val
-                            self.lbl_peak.configure(text=f"{self.peak_value}")
-                    else:
-                        self.lbl_curr.configure(text=payload)
-                else:
-                    self.status.configure(text=f"Read error: {payload}")
-        except queue.Empty:
-            pass
-        if not self.stop_flag.is_set():
-            self.after(100, self._drain_queue)
+        with self._latest_lock:
+            item, self._latest = self._latest, None
+        if item is not None:
+            kind, val, payload = item
+            if kind == "ok":
+                txt = f"{val}" if val is not None else payload
+                if txt != self._last_curr_text:
+                    self.lbl_curr.configure(text=txt)
+                    self._last_curr_text = txt
+                if self.peak_value is not None:
+                    txt = f"{self.peak_value}"
+                    if txt != self._last_peak_text:
+                        self.lbl_peak.configure(text=txt)
+                        self._last_peak_text = txt
+            else:
+                self.status.configure(text=f"Read error: {payload}")
+
+    def _watchdog(self):
+        # страховка: если событие потерялось, слот всё равно заберём раз в секунду
+        self._watchdog_job = None
+        if self.stop_flag.is_set():
+            return
+        self._drain_queue()
+        self._watchdog_job = self.after(1000, self._watchdog)
 
     def destroy(self):
         self._stop_polling()
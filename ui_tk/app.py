@@ -1,13 +1,15 @@
-import threading, queue, time
+import functools
+import threading
+from types import MappingProxyType
 import tkinter as tk
 from tkinter import ttk, messagebox
 import tkinter.font as tkfont
 
 from core.constants import (
-    DEFAULT_BACKENDS, PREFERRED_USB, POLL_PERIOD_S,
-    SCPI_QUERY_POWER, SCPI_ZERO, SCPI_QUERY_FREQ, SCPI_SET_FREQ,
+    PREFERRED_USB, POLL_PERIOD_S, POLL_TIMEOUT_MS,
+    SCPI_QUERY_POWER, SCPI_ZERO, SCPI_QUERY_FREQ,
 )
-from core.utils import parse_float
+from core.utils import parse_float, parse_hz
 
 # --- optional import of parse_idn from core.utils if present
 try:
@@ -15,8 +17,7 @@ try:
 except Exception:
     _parse_idn_external = None
 
-from drivers.discovery import scan_usb_usbtmc
-from core.meter import Meter
+from core.controller import MeasurementController
 
 
 def _parse_idn_local(idn: str):
@@ -35,14 +36,17 @@ def _parse_idn_local(idn: str):
     }
 
 
+@functools.lru_cache(maxsize=16)
 def parse_idn(idn: str):
-    """Use project-level parser if available, otherwise fallback."""
+    """Use project-level parser if available, otherwise fallback.
+    IDN of an instrument never changes, so results are memoized; the cached
+    mapping is shared between callers and therefore read-only."""
     if _parse_idn_external is not None:
         try:
-            return _parse_idn_external(idn)
+            return MappingProxyType(dict(_parse_idn_external(idn)))
         except Exception:
             pass
-    return _parse_idn_local(idn)
+    return MappingProxyType(_parse_idn_local(idn))
 
 
 class App(tk.Tk):
@@ -56,27 +60,38 @@ class App(tk.Tk):
         self.bind("<Escape>", self._exit_fullscreen)
 
         self.BASE_W, self.BASE_H = 1280, 720
-        self._font_objs = {}
-        self._resize_job = None
+        self._base_scaling = float(self.tk.call("tk", "scaling"))
 
-        # логика/метр (теперь через гибридный фасад)
-        self.meter = Meter(DEFAULT_BACKENDS)
-        self.read_queue = queue.Queue()
+        # логика/метр (теперь через гибридный фасад, общий с контроллером)
+        self.controller = MeasurementController()
+        self.meter = self.controller.meter
+        self._latest = None           # последний результат опроса: пишет поток, читает Tk
+        self._latest_lock = threading.Lock()
         self.stop_flag = threading.Event()
         self.poll_thread = None
         self.peak_value = None
+        self._last_curr_text = None   # что уже выведено в метках — повтор не отправляем в Tk
+        self._last_peak_text = None
 
         # IDN state
         self.idn_vendor = tk.StringVar(value="")
         self.idn_model = tk.StringVar(value="")
         self.idn_serial = tk.StringVar(value="")
         self.idn_firmware = tk.StringVar(value="")
+        self._last_idn = None
+        self._scan_busy = False
+        self._scan_result = None
+        self._scan_then_connect = False
 
-        # UI (без изменений внешнего вида + добавлен блок "Прибор")
+        # масштаб до создания виджетов, затем UI (без изменений внешнего вида + блок "Прибор")
+        self._apply_scale()
+        self._init_styles()
         self._build_ui()
 
-        self._apply_scale()
-        self.bind("<Configure>", self._on_configure)
+        self.bind("<<Reading>>", self._on_reading_event)
+        self.bind("<<ScanDone>>", self._on_scan_done)
+        self.bind("<Unmap>", self._on_unmap)
+        self.bind("<Map>", self._on_map)
 
         # автоскан/автоподключение
         self.after(200, self._auto_scan_and_connect)
@@ -89,40 +104,26 @@ class App(tk.Tk):
 
     def set_controller(self, controller):
         self.controller = controller
+        self.meter = controller.meter
 
     def _apply_scale(self):
-        s = self._calc_scale()
-
-        def mk(name, **kw):
-            f = self._font_objs.get(name)
-            if f is None:
-                f = tkfont.Font(**kw)
-                self._font_objs[name] = f
-            else:
-                for k, v in kw.items():
-                    f[k] = v
-            return f
-
-        font_norm  = mk("norm",  family="Segoe UI", size=max(11, int(12 * s)))
-        font_val   = mk("value", family="Segoe UI", size=max(16, int(22 * s)), weight="bold")
-        font_btn   = mk("btn",   family="Segoe UI", size=max(11, int(12 * s)))
-        font_title = mk("title", family="Segoe UI", size=max(12, int(13 * s)))
+        # экран после старта не меняется: один вызов tk scaling масштабирует все
+        # шрифты в пунктах — без пересчёта Font/стилей на каждый ресайз
+        s = max(self._calc_scale(), 11 / 12)  # как и раньше, мельче 11 pt не делаем
+        self.tk.call("tk", "scaling", s * self._base_scaling)
+
+    def _init_styles(self):
+        # размеры положительные (пункты) — их и масштабирует tk scaling;
+        # Entry/Combobox берут TkTextFont, Label/Button — TkDefaultFont
+        for name in ("TkDefaultFont", "TkTextFont"):
+            tkfont.nametofont(name).configure(family="Segoe UI", size=12)
+        font_title = tkfont.Font(family="Segoe UI", size=13)
+        font_val = tkfont.Font(family="Segoe UI", size=22, weight="bold")
 
         style = ttk.Style(self)
-        style.configure("TLabel",   font=font_norm)
         style.configure("TLabelframe.Label", font=font_title)
-        style.configure("TButton",  font=font_btn)
         style.configure("Value.TLabel", font=font_val)
-
-        self.res_entry.configure(font=font_norm)
-        self.cmb_found.configure(font=font_norm)
-        self.ent_freq.configure(font=font_norm)
-        # device info labels inherit style, no direct font set required
-
-    def _on_configure(self, _evt):
-        if self._resize_job:
-            self.after_cancel(self._resize_job)
-        self._resize_job = self.after(150, self._apply_scale)
+        self._fonts = (font_title, font_val)  # держим ссылки, иначе Tk удалит шрифты
 
     def _toggle_fullscreen(self, _=None):
         self.attributes("-fullscreen", not self.attributes("-fullscreen"))
@@ -136,10 +137,11 @@ class App(tk.Tk):
 
         # --- Connection
         frm_conn = ttk.LabelFrame(self, text="Connection")
-        frm_conn.pack(fill="x", expand=False, **pad)
+        frm_conn.grid(row=0, column=0, sticky="ew", **pad)
 
         ttk.Label(frm_conn, text="Resource:").grid(row=0, column=0, sticky="w")
-        self.res_entry = ttk.Entry(frm_conn)
+        self._res_var = tk.StringVar()
+        self.res_entry = ttk.Entry(frm_conn, textvariable=self._res_var)
         self.res_entry.grid(row=0, column=1, sticky="we", padx=6)
         self.btn_connect = ttk.Button(frm_conn, text="Connect", command=self.on_connect)
         self.btn_connect.grid(row=0, column=2, sticky="e")
@@ -158,7 +160,7 @@ class App(tk.Tk):
 
         # --- Device Info (IDN)
         frm_idn = ttk.LabelFrame(self, text="Прибор")
-        frm_idn.pack(fill="x", expand=False, **pad)
+        frm_idn.grid(row=1, column=0, sticky="ew", **pad)
 
         ttk.Label(frm_idn, text="Вендор:").grid(row=0, column=0, sticky="w")
         ttk.Label(frm_idn, textvariable=self.idn_vendor).grid(row=0, column=1, sticky="w", padx=6)
@@ -176,7 +178,7 @@ class App(tk.Tk):
 
         # --- Readings
         frm_vals = ttk.LabelFrame(self, text="Readings")
-        frm_vals.pack(fill="x", expand=False, **pad)
+        frm_vals.grid(row=2, column=0, sticky="ew", **pad)
 
         ttk.Label(frm_vals, text="Current Power:").grid(row=0, column=0, sticky="w")
         self.lbl_curr = ttk.Label(frm_vals, text="—", style="Value.TLabel")
@@ -188,7 +190,7 @@ class App(tk.Tk):
 
         # --- Controls
         frm_ctrl = ttk.LabelFrame(self, text="Controls")
-        frm_ctrl.pack(fill="x", expand=False, **pad)
+        frm_ctrl.grid(row=3, column=0, sticky="ew", **pad)
 
         ttk.Label(frm_ctrl, text="Freq (Hz):").grid(row=0, column=0, sticky="w")
         self.ent_freq = ttk.Entry(frm_ctrl, width=24)
@@ -199,15 +201,27 @@ class App(tk.Tk):
 
         # --- Status bar
         self.status = ttk.Label(self, text="Ready", relief="sunken", anchor="w")
-        self.status.pack(fill="x", padx=12, pady=(0, 12))
+        self.status.grid(row=4, column=0, sticky="sew", padx=12, pady=(0, 12))
+
+        # одна сетка на всё окно: растягиваем колонку, статус прижат к низу
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(4, weight=1)
 
     # ---------- helpers for IDN ----------
     def _clear_idn_fields(self):
+        self._last_idn = None
         for var in (self.idn_vendor, self.idn_model, self.idn_serial, self.idn_firmware):
             var.set("")
 
     def _update_idn_fields(self, idn_str: str):
-        info = parse_idn(idn_str)
+        # IDN статичен для прибора: тот же ответ — ничего не перерисовываем
+        if idn_str == self._last_idn:
+            return
+        self._last_idn = idn_str
+        self.after_idle(self._apply_idn, parse_idn(idn_str))
+
+    def _apply_idn(self, info):
+        # все четыре .set() в одном проходе idle — одна перерисовка
         self.idn_vendor.set(info.get("vendor", ""))
         self.idn_model.set(info.get("model", ""))
         self.idn_serial.set(info.get("serial", ""))
@@ -215,54 +229,78 @@ class App(tk.Tk):
 
     # ---------- логика кнопок (без визуальных изменений) ----------
     def on_scan(self):
-        addrs = scan_usb_usbtmc(DEFAULT_BACKENDS)
-        # Добавим «FAKE» в конец списка как опцию симулятора
-        if "FAKE" not in addrs:
-            addrs = list(addrs) + ["FAKE"]
-        self.cmb_found["values"] = addrs
+        self._start_scan()
+
+    def _start_scan(self, then_connect: bool = False):
+        # скан идёт в фоне: libusb-перечисление не должно морозить окно
+        if self._scan_busy:
+            return
+        self._scan_busy = True
+        self._scan_then_connect = then_connect
+        self.btn_scan.configure(state="disabled")
+        self.status.configure(text="Scanning…")
+        threading.Thread(target=self._scan_worker, daemon=True).start()
+
+    def _scan_worker(self):
+        try:
+            # контроллер добавит «FAKE» и запомнит, какой backend видел какой ресурс
+            addrs = self.controller.scan()
+        except Exception:
+            addrs = []
+        self._scan_result = addrs
+        try:
+            self.event_generate("<<ScanDone>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            pass  # окно уже закрыто
+
+    def _on_scan_done(self, _evt=None):
+        addrs, self._scan_result = self._scan_result or [], None
+        self._scan_busy = False
+        self.btn_scan.configure(state="normal")
+        self.cmb_found.configure(values=tuple(addrs))
         if addrs:
             self.cmb_found.current(0)
-            self.res_entry.delete(0, tk.END)
-            self.res_entry.insert(0, addrs[0])
+            self._res_var.set(addrs[0])
             self.status.configure(text=f"Found {len(addrs)} device(s). ('FAKE' = simulator)")
         else:
             self.status.configure(text="Devices not found.")
+        if self._scan_then_connect:
+            self._scan_then_connect = False
+            if addrs:
+                self.on_connect()
+            else:
+                self.status.configure(text="No devices. Press Scan or enter address manually.")
 
     def on_pick_found(self, _evt=None):
         v = self.cmb_found.get().strip()
         if v:
-            self.res_entry.delete(0, tk.END)
-            self.res_entry.insert(0, v)
+            self._res_var.set(v)
 
     def _auto_scan_and_connect(self):
         if PREFERRED_USB.strip():
-            self.res_entry.delete(0, tk.END)
-            self.res_entry.insert(0, PREFERRED_USB.strip())
+            self._res_var.set(PREFERRED_USB.strip())
             self.on_connect()
             return
-        self.on_scan()
-        if self.cmb_found["values"]:
-            self.on_connect()
-        else:
-            self.status.configure(text="No devices. Press Scan or enter address manually.")
+        self._start_scan(then_connect=True)
 
     def on_connect(self):
         res = self.res_entry.get().strip()
         if not res:
             messagebox.showwarning("Power Meter", "Введите адрес ресурса (USB0::...::INSTR или FAKE)." )
             return
-        if self.meter.is_connected_to(res):
+        if self.controller.is_connected_to(res):
             self.status.configure(text=f"Already connected: {res}")
             return
         self._stop_polling()
+        self.meter.close()
         try:
-            self.meter.connect(res)
-            self.backend_label.configure(text=self.meter.backend_in_use or "default")
-            idn = self.meter.idn().strip()
+            idn = self.controller.connect(res).strip()
+            self.backend_label.configure(text=self.controller.backend_in_use() or "default")
             self._update_idn_fields(idn)
             self.status.configure(text=f"Connected: {res}{(' | ' + idn) if idn else ''}")
             self.peak_value = None
             self.lbl_peak.configure(text="—")
+            self._last_peak_text = None
             self._start_polling()
         except Exception as e:
             self._clear_idn_fields()
@@ -271,18 +309,17 @@ class App(tk.Tk):
 
     def on_zero(self):
         try:
-            from core.constants import SCPI_ZERO
             self.meter.write(SCPI_ZERO)
             self.status.configure(text="Zero sent")
             self.peak_value = None
             self.lbl_peak.configure(text="—")
+            self._last_peak_text = None
         except Exception as e:
             self.status.configure(text=f"Zero error: {e}")
             messagebox.showerror("Zero error", str(e))
 
     def on_get_freq(self):
         try:
-            from core.constants import SCPI_QUERY_FREQ
             resp = self.meter.query(SCPI_QUERY_FREQ).strip()
             self.ent_freq.delete(0, tk.END)
             self.ent_freq.insert(0, resp)
@@ -292,68 +329,100 @@ class App(tk.Tk):
             messagebox.showerror("Freq get error", str(e))
 
     def on_set_freq(self):
-        from core.constants import SCPI_SET_FREQ
         val = self.ent_freq.get().strip()
         if not val:
             messagebox.showwarning("Set Freq", "Введите частоту, можно с суффиксом (Hz/kHz/MHz/GHz)." )
             return
         try:
-            hz = parse_float(val)
+            hz = parse_hz(val)
             if hz is None:
                 raise ValueError(f"Не удалось распознать частоту: {val}")
-            self.meter.write(SCPI_SET_FREQ.format(freq=int(hz)))
-            self.status.configure(text=f"Freq set: {val} → {int(hz)} Hz")
+            confirmed = self.controller.set_and_get_freq(hz)
+            self.ent_freq.delete(0, tk.END)
+            self.ent_freq.insert(0, str(confirmed))
+            self.status.configure(text=f"Freq set: {val} → {confirmed} Hz")
         except Exception as e:
             self.status.configure(text=f"Freq set error: {e}")
             messagebox.showerror("Freq set error", str(e))
 
     # ---------- поток опроса ----------
     def _start_polling(self):
-        self.stop_flag.clear()
-        self.poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+        # свой флаг на каждый поток: прежний (если ещё висит в query) завершится сам
+        self.stop_flag = threading.Event()
+        self.poll_thread = threading.Thread(target=self._poll_loop, args=(self.stop_flag,), daemon=True)
         self.poll_thread.start()
-        self.after(100, self._drain_queue)
 
     def _stop_polling(self):
         self.stop_flag.set()
+        # не ждём поток, висящий в query: закрытие ресурса в on_connect его разбудит
         if self.poll_thread and self.poll_thread.is_alive():
-            self.poll_thread.join(timeout=1.0)
+            self.poll_thread.join(timeout=0.05)
         self.poll_thread = None
+        with self._latest_lock:
+            self._latest = None
 
-    def _poll_loop(self):
-        while not self.stop_flag.is_set():
+    def _poll_loop(self, stop: threading.Event):
+        while not stop.is_set():
             try:
-                raw = self.meter.query(SCPI_QUERY_POWER)
+                with self.meter.with_timeout(POLL_TIMEOUT_MS):
+                    raw = self.meter.query(SCPI_QUERY_POWER)
+                if stop.is_set():
+                    break  # поток устарел (переподключились) — ответ старого прибора не публикуем
                 val = parse_float(raw)
                 if val is not None:
                     if self.peak_value is None or val > self.peak_value:
                         self.peak_value = val
-                    self.read_queue.put(("ok", val, self.peak_value))
+                    item = ("ok", val, self.peak_value)
                 else:
-                    self.read_queue.put(("err", f"Parse error: {raw}"))
+                    item = ("err", f"Parse error: {raw}")
             except Exception as e:
-                self.read_queue.put(("err", str(e)))
-            finally:
-                time.sleep(POLL_PERIOD_S)
-
-    def _drain_queue(self):
-        try:
-            while True:
-                tag, *payload = self.read_queue.get_nowait()
-                if tag == "ok":
-                    curr, peak = payload
-                    self.lbl_curr.configure(text=f"{curr:.3f} dBm")
-                    if peak is not None:
-                        self.lbl_peak.configure(text=f"{peak:.3f} dBm")
-                    self.status.configure(text="OK")
-                else:
-                    err_msg = payload[0] if payload else "Error"
-                    self.status.configure(text=f"Read error: {err_msg}")
-        except queue.Empty:
-            pass
+                if stop.is_set():
+                    break  # ошибка из-за закрытия ресурса при переподключении
+                item = ("err", str(e))
+            with self._latest_lock:
+                self._latest = item
+            # будим Tk только когда есть данные (event_generate потокобезопасен)
+            try:
+                self.event_generate("<<Reading>>", when="tail")
+            except (RuntimeError, tk.TclError):
+                break  # окно уже закрыто
+            if stop.wait(POLL_PERIOD_S):
+                break
+
+    def _on_unmap(self, evt):
+        # окно скрыто — прибор не опрашиваем (Unmap дочерних виджетов не в счёт)
+        if evt.widget is self:
+            self.stop_flag.set()
+
+    def _on_map(self, evt):
+        if evt.widget is self:
+            self._resume_polling_if_connected()
+
+    def _resume_polling_if_connected(self):
+        if self.meter.resource is not None and (self.poll_thread is None or self.stop_flag.is_set()):
+            self._start_polling()
 
-        if not self.stop_flag.is_set():
-            self.after(100, self._drain_queue)
+    def _on_reading_event(self, _evt=None):
+        with self._latest_lock:
+            item, self._latest = self._latest, None
+        if item is None:
+            return
+        tag, *payload = item
+        if tag == "ok":
+            curr, peak = payload
+            txt = f"{curr:.3f} dBm"
+            if txt != self._last_curr_text:
+                self.lbl_curr.configure(text=txt)
+                self._last_curr_text = txt
+            if peak is not None:
+                txt = f"{peak:.3f} dBm"
+                if txt != self._last_peak_text:
+                    self.lbl_peak.configure(text=txt)
+                    self._last_peak_text = txt
+            self.status.configure(text="OK")
+        else:
+            err_msg = payload[0] if payload else "Error"
+            self.status.configure(text=f"Read error: {err_msg}")
 
     def on_close(self):
         try:
@@ -361,7 +430,7 @@ class App(tk.Tk):
         except Exception:
             pass
         try:
-            self.meter.close()
+            self.controller.close()  # прибор + закэшированные ResourceManager'ы
         except Exception:
             pass
         self.destroy()